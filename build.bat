@@ -12,6 +12,10 @@ if not exist "yolov8n.pt" (
     echo Download completo.
 )
 
+:: Step 0.5: Export weights-only state_dict (input of the encryption step)
+echo Exporting model state_dict...
+python scripts/save_model.py
+
 :: Step 1: Generate RSA keys
 echo Generating RSA key pair...
 python scripts/generate_key.py
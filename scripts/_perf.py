@@ -0,0 +1,178 @@
+"""
+Diagnóstico de Desempenho Criptográfico em Tempo de Execução
+
+Verifica se a libcrypto usada pelo `cryptography` está executando os caminhos
+acelerados por hardware (AES-NI/VAES + CLMUL para AES-GCM, SHA-NI para hashes).
+Uma build sem essas extensões, ou uma imagem de container em CPU sem elas, cai
+silenciosamente para AES por tabelas: mais lento e sujeito a canais laterais
+de cache. Sem este diagnóstico a regressão só aparece no tempo do benchmark.
+
+Informações reportadas:
+- Vazão de AES-128-GCM medida sobre um bloco fixo de 1 MiB
+- Versão do OpenSSL do `cryptography` e do módulo `ssl`
+- Recursos de CPU relevantes: bits de OPENSSL_ia32cap (x86), quando o símbolo
+  está exportado (OpenSSL 1.1), ou flags de /proc/cpuinfo (Linux); a variável
+  de ambiente OPENSSL_ia32cap, se definida, pode mascarar esses recursos
+"""
+
+import ctypes
+import ctypes.util
+import os
+import ssl
+import time
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Bloco fixo criptografado pela sonda e número de repetições medidas
+_ONE_MIB = bytes(1 << 20)
+_PROBE_ROUNDS = 10
+
+# Abaixo desta vazão é improvável que AES-NI esteja em uso
+_HW_AES_MIN_GBPS = 1.0
+
+# Recursos em OPENSSL_ia32cap_P: (palavra, bit)
+# palavras 0/1 = CPUID(1) EDX/ECX; palavras 2/3 = CPUID(7) EBX/ECX
+# (AVX-VNNI fica em CPUID(7,1) EAX, fora dessas palavras: ver has_vnni)
+_IA32CAP_FEATURES = {
+    "AES-NI": (1, 25),
+    "PCLMULQDQ": (1, 1),
+    "AVX2": (2, 5),
+    "SHA-NI": (2, 29),
+    "VAES": (3, 9),
+    "VPCLMULQDQ": (3, 10),
+    "AVX512-VNNI": (3, 11),
+}
+
+# Mesmos recursos com os nomes usados em /proc/cpuinfo
+_CPUINFO_FLAGS = {
+    "AES-NI": "aes",
+    "PCLMULQDQ": "pclmulqdq",
+    "AVX2": "avx2",
+    "SHA-NI": "sha_ni",
+    "VAES": "vaes",
+    "VPCLMULQDQ": "vpclmulqdq",
+    "AVX512-VNNI": "avx512_vnni",
+    "AVX-VNNI": "avx_vnni",
+}
+
+
+def _ia32cap():
+    """
+    Lê o vetor OPENSSL_ia32cap_P da libcrypto carregada no processo.
+
+    Returns:
+        list[int] | None: As quatro palavras de capacidade, ou None se o
+        símbolo não estiver acessível (CPU não x86, OpenSSL estático, Windows)
+    """
+    for name in (None, ctypes.util.find_library("crypto")):
+        try:
+            loc = ctypes.CDLL(name).OPENSSL_ia32cap_loc
+        except (OSError, AttributeError, TypeError):
+            continue
+        loc.restype = ctypes.POINTER(ctypes.c_uint * 4)
+        return list(loc().contents)
+    return None
+
+
+def _cpu_features():
+    """
+    Detecta os recursos de _IA32CAP_FEATURES / _CPUINFO_FLAGS na CPU atual.
+
+    Returns:
+        dict[str, bool] | None: Presença de cada recurso, ou None se não
+        houver fonte disponível (nem OPENSSL_ia32cap_loc nem /proc/cpuinfo)
+    """
+    cap = _ia32cap()
+    if cap is not None:
+        return {
+            name: bool(cap[word] >> bit & 1)
+            for name, (word, bit) in _IA32CAP_FEATURES.items()
+        }
+    flags = _cpuinfo_flags()
+    if flags is None:
+        return None
+    return {name: flag in flags for name, flag in _CPUINFO_FLAGS.items()}
+
+
+def _cpuinfo_flags():
+    """
+    Lê as flags de CPU da primeira entrada de /proc/cpuinfo.
+
+    Returns:
+        set[str] | None: Flags do kernel, ou None fora do Linux
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return None
+
+
+def has_vnni():
+    """
+    Indica se a CPU tem instruções int8 VNNI (AVX512-VNNI ou AVX-VNNI).
+
+    Usa /proc/cpuinfo quando disponível. OPENSSL_ia32cap não tem o bit de
+    AVX-VNNI, então por essa via apenas a presença de AVX512-VNNI é
+    conclusiva; sem ela o resultado é desconhecido (None), não False.
+
+    Returns:
+        bool | None: Presença de VNNI, ou None se não for possível detectar
+    """
+    flags = _cpuinfo_flags()
+    if flags is not None:
+        return "avx512_vnni" in flags or "avx_vnni" in flags
+    cap = _ia32cap()
+    if cap is None:
+        return None
+    word, bit = _IA32CAP_FEATURES["AVX512-VNNI"]
+    return True if cap[word] >> bit & 1 else None
+
+
+def _probe_aes():
+    """
+    Mede a vazão de AES-GCM e exibe o diagnóstico da libcrypto.
+
+    Returns:
+        float: Vazão medida em GB/s
+
+    Example:
+        >>> _probe_aes()
+        AES-GCM: 3.20 GB/s — aceleração por hardware provável
+        ...
+    """
+    # Chave descartável: reutilizar o nonce aqui não protege nenhum dado
+    aesgcm = AESGCM(AESGCM.generate_key(bit_length=128))
+    nonce = os.urandom(12)
+    aesgcm.encrypt(nonce, _ONE_MIB, None)  # aquecimento
+
+    start = time.perf_counter_ns()
+    for _ in range(_PROBE_ROUNDS):
+        aesgcm.encrypt(nonce, _ONE_MIB, None)
+    elapsed = (time.perf_counter_ns() - start) * 1e-9
+    gbps = _PROBE_ROUNDS * len(_ONE_MIB) / elapsed / 1e9
+
+    if gbps >= _HW_AES_MIN_GBPS:
+        print(f"AES-GCM: {gbps:.2f} GB/s — aceleração por hardware provável")
+    else:
+        print(f"AES-GCM: {gbps:.2f} GB/s — sem AES por hardware?")
+
+    try:
+        from cryptography.hazmat.backends.openssl.backend import backend
+        print(f"OpenSSL (cryptography): {backend.openssl_version_text()}")
+    except (ImportError, AttributeError):
+        pass
+    print(f"OpenSSL (ssl): {ssl.OPENSSL_VERSION}")
+
+    features = _cpu_features()
+    if features is not None:
+        flags = ", ".join(
+            f"{name}={'sim' if present else 'não'}" for name, present in features.items()
+        )
+        print(f"CPU: {flags}")
+    if "OPENSSL_ia32cap" in os.environ:
+        print(f"OPENSSL_ia32cap={os.environ['OPENSSL_ia32cap']} (máscara ativa)")
+
+    return gbps
@@ -10,7 +10,7 @@ Funcionalidades Principais:
 - Descriptografia de modelos usando AES-GCM
 - Carregamento flexível de modelos YOLO em diferentes formatos
 - Suporte a executáveis PyInstaller (sys._MEIPASS)
-- Configuração automática de globals seguros para torch.load()
+- Globals seguros para torch.load() restritos ao próprio carregamento
 
 Fluxo de Descriptografia:
 1. Descriptografa chave AES usando chave privada RSA
@@ -26,7 +26,8 @@ Compatibilidade:
 
 Dependências:
     - cryptography: Operações criptográficas
-    - torch: Framework de deep learning
+    - torch: Framework de deep learning (importado apenas ao carregar
+      modelos PyTorch; o caminho ONNX Runtime não depende dele)
     - ultralytics: Biblioteca YOLO
     - io: Operações de buffer em memória
 
@@ -38,15 +39,90 @@ Versão: 1.0
 import io
 import os
 import sys
+import mmap
+import copy
+import json
+import struct
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-import torch
-from ultralytics.nn.tasks import DetectionModel
-import torch.serialization
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-# Configurar globals seguros para carregamento de modelos YOLO
-torch.serialization.add_safe_globals([DetectionModel])
+# Diretório de trabalho resolvido uma vez (base de resource_path em desenvolvimento)
+_CWD_ABS = os.path.abspath(".")
+
+# Tamanho dos blocos processados por update_into() na descriptografia (4 MiB)
+DECRYPT_CHUNK = 1 << 22
+
+# Layout do arquivo criptografado: nonce || ciphertext || tag
+NONCE_LEN = 12
+TAG_LEN = 16
+_NONCE_SL = slice(0, NONCE_LEN)
+_CT_SL = slice(NONCE_LEN, -TAG_LEN)
+_TAG_SL = slice(-TAG_LEN, None)
+
+
+class _MemoryViewReader:
+    """
+    Leitor somente-leitura no estilo arquivo sobre um memoryview.
+    
+    Substitui io.BytesIO(model_bytes) no torch.load(): BytesIO copia o buffer
+    inteiro no construtor, enquanto este leitor serve read/readinto/seek
+    diretamente da memória do texto claro, sem cópia adicional do modelo.
+    
+    Args:
+        buffer (bytes | bytearray | memoryview): Dados a serem lidos
+    
+    Note:
+        - Implementa apenas o necessário para torch.load(): read, readinto,
+          readline, seek, tell e seekable
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos += len(chunk)
+        return chunk
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def readline(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        # Procura o fim de linha em janelas pequenas (sem copiar o restante)
+        scan = self._pos
+        while scan < end:
+            window = self._view[scan:min(scan + 4096, end)].tobytes()
+            newline = window.find(b"\n")
+            if newline >= 0:
+                return self.read(scan + newline + 1 - self._pos)
+            scan += len(window)
+        return self.read(end - self._pos)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
 
 
 def resource_path(relative_path, for_output=False):
@@ -78,12 +154,12 @@ def resource_path(relative_path, for_output=False):
     
     Example:
         >>> # Em desenvolvimento
-        >>> resource_path("model/model.pth.enc")
-        '/projeto/model/model.pth.enc'
+        >>> resource_path("model/model.safetensors.enc")
+        '/projeto/model/model.safetensors.enc'
         
         >>> # Em executável PyInstaller
-        >>> resource_path("model/model.pth.enc")  
-        '/tmp/_MEI123456/model/model.pth.enc'
+        >>> resource_path("model/model.safetensors.enc")  
+        '/tmp/_MEI123456/model/model.safetensors.enc'
         
         >>> # Para arquivos de saída
         >>> resource_path("results/output.csv", for_output=True)
@@ -93,20 +169,70 @@ def resource_path(relative_path, for_output=False):
         - Essencial para aplicações que precisam funcionar empacotadas
         - for_output=True deve ser usado apenas para arquivos que serão criados
         - Caminho base é determinado automaticamente pelo ambiente
+        - Em desenvolvimento, a base é o diretório de trabalho no momento da
+          importação do módulo
     """
     if for_output:
         return os.path.abspath(relative_path)
     
-    try:
-        # Tentar obter caminho base do PyInstaller
-        base_path = sys._MEIPASS
-    except Exception:
-        # Fallback para diretório atual (desenvolvimento)
-        base_path = os.path.abspath(".")
+    # Caminho base do PyInstaller, ou diretório atual (desenvolvimento)
+    base_path = getattr(sys, "_MEIPASS", None) or _CWD_ABS
     
     return os.path.join(base_path, relative_path)
 
 
+def _advise_sequential(fd, mm):
+    """
+    Informa ao kernel que o arquivo será lido uma única vez, sequencialmente.
+    
+    Usa posix_fadvise (SEQUENTIAL + WILLNEED) no descritor e
+    madvise(MADV_SEQUENTIAL) no mapeamento, quando disponíveis. Em sistemas
+    sem essas APIs (ex: Windows) não faz nada.
+    
+    Args:
+        fd (int): Descritor do arquivo aberto
+        mm (mmap.mmap): Mapeamento do arquivo
+    """
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+
+
+def _drop_page_cache(fd):
+    """
+    Libera do page cache as páginas de um arquivo lido uma única vez.
+    
+    Evita que o modelo criptografado (lido apenas na inicialização) expulse
+    páginas quentes de outros processos. Não faz nada sem posix_fadvise.
+    
+    Args:
+        fd (int): Descritor do arquivo aberto
+    """
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_private_key(private_key_path, mtime_ns):
+    """
+    Carrega e faz o parse (ASN.1) de uma chave privada RSA PEM, com cache.
+    
+    O mtime faz parte da chave do cache: se o arquivo for regenerado, a nova
+    chave é carregada na próxima chamada.
+    
+    Args:
+        private_key_path (str): Caminho para a chave privada RSA em formato PEM
+        mtime_ns (int): st_mtime_ns do arquivo (apenas para invalidar o cache)
+    
+    Returns:
+        RSAPrivateKey: Chave privada carregada
+    """
+    with open(private_key_path, "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=None)
+
+
 def decrypt_aes_key(enc_key_path, private_key_path):
     """
     Descriptografa chave AES usando chave privada RSA com OAEP padding.
@@ -136,8 +262,14 @@ def decrypt_aes_key(enc_key_path, private_key_path):
     
     Security Features:
         - Padding OAEP previne ataques de texto cifrado adaptativo
+        - RSA blinding sempre ativo: o OpenSSL calcula y = F(d, x·r^e mod N)
+          e devolve y·r⁻¹ mod N, tornando o tempo independente do texto
+          cifrado (que pode vir de um arquivo substituído). A biblioteca
+          cryptography não expõe meios de desativá-lo; o custo (~20-30% de
+          uma operação que ocorre uma vez por execução) é aceito
         - SHA-256 oferece resistência criptográfica adequada
         - Chave privada carregada sem senha (para automação)
+        - Parse do PEM reaproveitado entre chamadas (cache por caminho + mtime)
     
     Example:
         >>> aes_key = decrypt_aes_key(
@@ -156,9 +288,10 @@ def decrypt_aes_key(enc_key_path, private_key_path):
     with open(enc_key_path, "rb") as f:
         enc_key = f.read()
     
-    # Carregar chave privada RSA
-    with open(private_key_path, "rb") as f:
-        private_key = serialization.load_pem_private_key(f.read(), password=None)
+    # Carregar chave privada RSA (parse do PEM em cache por caminho + mtime)
+    private_key = _load_private_key(
+        private_key_path, os.stat(private_key_path).st_mtime_ns
+    )
     
     # Descriptografar chave AES usando RSA-OAEP
     return private_key.decrypt(
@@ -184,7 +317,7 @@ def decrypt_model(model_path, aes_key):
         aes_key (bytes): Chave AES descriptografada (16 bytes para AES-128)
     
     Returns:
-        bytes: Dados do modelo descriptografados (formato PyTorch original)
+        bytearray: Dados do modelo descriptografados (formato PyTorch original)
     
     Raises:
         FileNotFoundError: Se arquivo do modelo não existir
@@ -195,7 +328,7 @@ def decrypt_model(model_path, aes_key):
     File Format Expected:
         O arquivo deve conter: [12 bytes nonce] + [dados AES-GCM criptografados]
         - Nonce: 12 bytes iniciais (padrão AES-GCM)
-        - Ciphertext: Restante do arquivo (dados + tag de autenticação)
+        - Ciphertext: Restante do arquivo (dados + tag de autenticação de 16 bytes)
     
     Cryptographic Details:
         - Usa AES-GCM (Galois/Counter Mode)
@@ -210,27 +343,284 @@ def decrypt_model(model_path, aes_key):
     
     Example:
         >>> aes_key = decrypt_aes_key("key/aes_key.enc", "key/private.pem")
-        >>> model_data = decrypt_model("model/model.pth.enc", aes_key)
+        >>> model_data = decrypt_model("model/model.safetensors.enc", aes_key)
         >>> type(model_data)
-        <class 'bytes'>
+        <class 'bytearray'>
     
     Note:
         - Arquivo deve ter sido criptografado com mesmo formato (nonce + dados)
         - Falha na autenticação indica arquivo corrompido ou chave incorreta
-        - Dados retornados são bytes brutos do arquivo .pth original
+        - Dados retornados são bytes brutos do arquivo original (safetensors)
+        - Em Linux, usa posix_fadvise/madvise para leitura sequencial e libera
+          o page cache do arquivo ao final (leitura única)
+    """
+    return _decrypt_mapped_model(model_path, lambda: aes_key)
+
+
+def _decrypt_mapped_model(model_path, get_aes_key):
+    """
+    Mapeia o modelo criptografado e o descriptografa com a chave fornecida.
+    
+    O arquivo é mapeado (mmap, sem cópia para bytes Python) e o readahead é
+    solicitado ao kernel antes de obter a chave; assim, qualquer trabalho
+    feito em get_aes_key() (ex: aguardar o desembrulho RSA) se sobrepõe à
+    leitura do disco.
+    
+    Args:
+        model_path (str): Caminho para o arquivo do modelo criptografado
+        get_aes_key (callable): Função sem argumentos que retorna a chave AES
+    
+    Returns:
+        bytearray: Dados do modelo descriptografados
     """
-    # Ler arquivo completo do modelo criptografado
     with open(model_path, "rb") as f:
-        data = f.read()
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                _advise_sequential(f.fileno(), mm)
+                return decrypt_model_from_bytes(mm, get_aes_key())
+        finally:
+            _drop_page_cache(f.fileno())
+
+
+def load_and_decrypt_model(enc_key_path, private_key_path, model_path):
+    """
+    Desembrulha a chave AES e descriptografa o modelo com E/S sobreposta.
+    
+    Equivale a decrypt_model(model_path, decrypt_aes_key(...)), mas o
+    desembrulho RSA-OAEP roda em uma thread auxiliar enquanto a thread
+    principal mapeia o modelo e dispara o readahead (POSIX_FADV_WILLNEED).
+    O custo do RSA sai do caminho crítico quando a leitura do disco domina.
+    
+    Args:
+        enc_key_path (str): Caminho para o arquivo da chave AES criptografada
+        private_key_path (str): Caminho para a chave privada RSA em formato PEM
+        model_path (str): Caminho para o arquivo do modelo criptografado
     
-    # Separar nonce (12 bytes) e dados criptografados
-    nonce, ciphertext = data[:12], data[12:]
+    Returns:
+        bytearray: Dados do modelo descriptografados
     
-    # Inicializar AES-GCM com chave descriptografada
-    aesgcm = AESGCM(aes_key)
+    Raises:
+        Mesmas exceções de decrypt_aes_key() e decrypt_model()
     
-    # Descriptografar e autenticar dados
-    return aesgcm.decrypt(nonce, ciphertext, None)
+    Example:
+        >>> model_data = load_and_decrypt_model(
+        ...     "key/aes_key.enc", "key/private.pem", "model/model.safetensors.enc"
+        ... )
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        key_future = executor.submit(decrypt_aes_key, enc_key_path, private_key_path)
+        return _decrypt_mapped_model(model_path, key_future.result)
+
+
+def decrypt_model_from_bytes(enc_blob, aes_key):
+    """
+    Descriptografa modelo já carregado em memória usando AES-GCM.
+    
+    Variante de decrypt_model() que recebe o conteúdo do arquivo criptografado
+    em vez do caminho. Permite ler o arquivo uma única vez e reutilizar os bytes
+    em várias descriptografias (ex: iterações de benchmark).
+    
+    Args:
+        enc_blob (bytes | mmap.mmap): Conteúdo do arquivo criptografado
+                                      ([nonce] + [dados] + [tag])
+        aes_key (bytes): Chave AES descriptografada (16 bytes para AES-128)
+    
+    Returns:
+        bytearray: Dados do modelo descriptografados (formato PyTorch original)
+    
+    Raises:
+        cryptography.exceptions.InvalidTag: Se autenticação AES-GCM falhar
+        ValueError: Se chave AES for inválida ou dados corrompidos
+    
+    Implementation:
+        Usa a API Cipher/GCM com update_into() em blocos de DECRYPT_CHUNK
+        bytes, escrevendo direto em um único bytearray pré-alocado. A entrada
+        é lida via memoryview, então nenhuma cópia do texto cifrado é feita;
+        com mmap, o pico de memória é apenas o texto claro.
+        
+        O bytearray retornado é consumido sem novas cópias nem BytesIO
+        (safetensors via torch.frombuffer; torch.save via memfd + mmap). Não há etapa por
+        arquivo temporário: além de gravar o texto claro em disco, ela
+        acrescentaria uma escrita e uma leitura completas do modelo.
+    
+    Example:
+        >>> with open("model/model.safetensors.enc", "rb") as f:
+        ...     enc_blob = f.read()
+        >>> model_data = decrypt_model_from_bytes(enc_blob, aes_key)
+    """
+    # Separar nonce (NONCE_LEN bytes), dados criptografados e tag (TAG_LEN bytes finais)
+    data = memoryview(enc_blob)
+    ciphertext = data[_CT_SL]
+    try:
+        nonce, tag = bytes(data[_NONCE_SL]), bytes(data[_TAG_SL])
+        
+        # Inicializar AES-GCM com chave descriptografada e tag esperada
+        decryptor = Cipher(algorithms.AES(aes_key), modes.GCM(nonce, tag)).decryptor()
+        
+        # Descriptografar bloco a bloco direto no buffer de saída
+        # (update_into exige folga de block_size - 1 bytes, removida em seguida)
+        size = len(ciphertext)
+        plaintext = bytearray(size + 15)
+        with memoryview(plaintext) as out:
+            for offset in range(0, size, DECRYPT_CHUNK):
+                decryptor.update_into(
+                    ciphertext[offset:offset + DECRYPT_CHUNK], out[offset:]
+                )
+        del plaintext[size:]
+        
+        # Autenticar dados (levanta InvalidTag se a tag não conferir)
+        decryptor.finalize()
+        return plaintext
+    finally:
+        # Liberar views antes que um mmap de origem seja fechado
+        ciphertext.release()
+        data.release()
+
+
+# Modelo-base construído uma única vez a partir de yolov8n.yaml (ver _template_model)
+_TEMPLATE_MODEL = None
+
+
+def _template_model():
+    """
+    Retorna uma cópia de um DetectionModel('yolov8n.yaml') construído uma vez.
+    
+    Construir o modelo a partir do yaml exige parse da configuração,
+    instanciação de todas as camadas e inicialização aleatória de pesos que
+    são sobrescritos logo em seguida pelo state_dict. O modelo-base é criado
+    na primeira chamada e as seguintes apenas fazem copy.deepcopy().
+    
+    Os pesos e buffers do state_dict não são copiados: na cópia eles viram
+    tensores no device "meta" (só forma e dtype, sem memória), que
+    load_state_dict(..., assign=True) substitui pelos tensores carregados.
+    
+    Returns:
+        DetectionModel: Cópia do modelo-base com pesos "meta"; deve receber
+        load_state_dict(..., assign=True) antes do uso
+    """
+    import torch
+    
+    build_model_template()
+    memo = {}
+    for tensor in _TEMPLATE_MODEL.state_dict(keep_vars=True).values():
+        placeholder = torch.empty_like(tensor, device="meta")
+        if isinstance(tensor, torch.nn.Parameter):
+            placeholder = torch.nn.Parameter(placeholder, tensor.requires_grad)
+        memo[id(tensor)] = placeholder
+    return copy.deepcopy(_TEMPLATE_MODEL, memo)
+
+
+def build_model_template():
+    """
+    Constrói antecipadamente o modelo-base usado por load_model_from_bytes().
+    
+    O modelo-base é criado na primeira carga de um state_dict; chamar esta
+    função antes (ex: fora de uma janela de medição) tira esse custo único
+    da primeira carga. Chamadas repetidas não têm efeito.
+    """
+    global _TEMPLATE_MODEL
+    if _TEMPLATE_MODEL is None:
+        from ultralytics.nn.tasks import DetectionModel
+        _TEMPLATE_MODEL = DetectionModel('yolov8n.yaml')
+
+
+# Tipos de tensor do formato safetensors (nomes de atributos de torch)
+_SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+def _is_safetensors(data):
+    """Indica se o buffer começa com um cabeçalho safetensors válido."""
+    if len(data) < 9:
+        return False
+    (header_len,) = struct.unpack_from("<Q", data)
+    return 8 + header_len <= len(data) and data[8] == ord("{")
+
+
+def _load_safetensors_frombuffer(model_bytes):
+    """
+    Lê um arquivo safetensors sem copiar os tensores.
+    
+    O formato é um cabeçalho JSON (precedido do seu tamanho em 8 bytes)
+    com dtype, forma e intervalo de bytes de cada tensor, seguido dos dados
+    contíguos. Cada tensor é criado com torch.frombuffer() sobre o próprio
+    buffer descriptografado; nenhum pickle é executado.
+    
+    Args:
+        model_bytes (bytes | bytearray): Arquivo safetensors descriptografado
+            (os tensores retornados compartilham esta memória; buffers
+            somente leitura são copiados uma vez)
+    
+    Returns:
+        dict[str, torch.Tensor]: state_dict
+    """
+    import torch
+    
+    data = memoryview(model_bytes)
+    if data.readonly:
+        data = memoryview(bytearray(data))
+    (header_len,) = struct.unpack_from("<Q", data)
+    header = json.loads(bytes(data[8:8 + header_len]))
+    header.pop("__metadata__", None)
+    
+    base = 8 + header_len
+    state_dict = {}
+    for name, info in header.items():
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        if end > start:
+            tensor = torch.frombuffer(data[base + start:base + end], dtype=dtype)
+        else:
+            tensor = torch.empty(0, dtype=dtype)
+        state_dict[name] = tensor.view(info["shape"])
+    return state_dict
+
+
+def _torch_load_bytes(model_bytes):
+    """
+    Executa torch.load() sobre bytes descriptografados, sem tocar o disco.
+    
+    Em Linux, copia o texto claro para um arquivo anônimo em RAM
+    (os.memfd_create) e carrega com mmap=True: os storages dos tensores
+    passam a ser páginas mapeadas, alocadas sob demanda. Nos demais sistemas, lê direto da memória via _MemoryViewReader (nunca via
+    arquivo temporário, para não gravar o modelo em claro no disco).
+    
+    Args:
+        model_bytes (bytes | bytearray): Dados do modelo PyTorch descriptografados
+    
+    Returns:
+        object: Objeto desserializado (dict, state_dict ou DetectionModel)
+    
+    Note:
+        - Sempre usa weights_only=True (apenas tensores e globals permitidos
+          pelo safe_globals ativo no chamador)
+    """
+    import torch
+    
+    cpu = torch.device("cpu")
+    if not hasattr(os, "memfd_create"):
+        return torch.load(_MemoryViewReader(model_bytes), map_location=cpu, weights_only=True)
+
+    fd = os.memfd_create("model", os.MFD_CLOEXEC)
+    try:
+        with open(fd, "wb", closefd=False) as f:
+            f.write(model_bytes)
+        # O mapeamento criado pelo torch.load mantém o conteúdo vivo após o close
+        return torch.load(
+            f"/proc/self/fd/{fd}", map_location=cpu, mmap=True, weights_only=True
+        )
+    finally:
+        os.close(fd)
 
 
 def load_model_from_bytes(model_bytes: bytes):
@@ -242,7 +632,7 @@ def load_model_from_bytes(model_bytes: bytes):
     salvos como objetos DetectionModel ou como state_dict.
     
     Args:
-        model_bytes (bytes): Dados do modelo PyTorch em formato bytes
+        model_bytes (bytes | bytearray): Dados do modelo PyTorch descriptografados
     
     Returns:
         DetectionModel: Modelo YOLO carregado e configurado para inferência
@@ -254,6 +644,7 @@ def load_model_from_bytes(model_bytes: bytes):
         RuntimeError: Se houver erro no carregamento do PyTorch
     
     Supported Formats:
+        0. Arquivo safetensors (state_dict, carregado sem pickle)
         1. Dict com chave "model" contendo DetectionModel
         2. Dict com chave "model" contendo state_dict
         3. Dict contendo state_dict diretamente
@@ -261,8 +652,11 @@ def load_model_from_bytes(model_bytes: bytes):
     
     Loading Strategy:
         - Carrega dados em CPU para compatibilidade máxima
+        - weights_only=True; em Linux, tensores mapeados (mmap) a partir de
+          um memfd em RAM
         - Detecta formato automaticamente
-        - Cria novo modelo com configuração padrão se necessário
+        - Para state_dict, copia um modelo-base construído uma única vez e
+          associa os tensores carregados (assign=True, sem cópia de pesos)
         - Configura modelo para modo de inferência (eval)
     
     YOLO Configuration:
@@ -271,7 +665,7 @@ def load_model_from_bytes(model_bytes: bytes):
         - Suporte a DetectionModel (detecção de objetos)
     
     Example:
-        >>> model_data = decrypt_model("model.pth.enc", aes_key)
+        >>> model_data = decrypt_model("model.safetensors.enc", aes_key)
         >>> model = load_model_from_bytes(model_data)
         >>> model.eval()  # Já configurado automaticamente
         >>> type(model)
@@ -281,13 +675,20 @@ def load_model_from_bytes(model_bytes: bytes):
         - Modelo é automaticamente configurado para modo eval()
         - Carregamento em CPU permite uso em diferentes dispositivos
         - Requer configuração YOLO (yolov8n.yaml) acessível
-        - add_safe_globals([DetectionModel]) deve ser chamado antes do uso
+        - DetectionModel é permitido no unpickler apenas durante esta
+          chamada (safe_globals), e ultralytics só é importado aqui
     """
-    # Criar buffer em memória a partir dos bytes
-    buffer = io.BytesIO(model_bytes)
-    
-    # Carregar dados do PyTorch (CPU para compatibilidade)
-    loaded = torch.load(buffer, map_location=torch.device("cpu"))
+    # Import tardio: evita carregar torch/ultralytics em quem só descriptografa
+    import torch.serialization
+    from ultralytics.nn.tasks import DetectionModel
+
+    if _is_safetensors(model_bytes):
+        # safetensors: tensores sobre o buffer, sem pickle
+        loaded = _load_safetensors_frombuffer(model_bytes)
+    else:
+        # Carregar dados do PyTorch (CPU, weights_only, mmap via memfd em Linux)
+        with torch.serialization.safe_globals([DetectionModel]):
+            loaded = _torch_load_bytes(model_bytes)
 
     # Processar diferentes formatos de modelo
     if isinstance(loaded, dict):
@@ -299,14 +700,14 @@ def load_model_from_bytes(model_bytes: bytes):
                 model = model_data
             elif isinstance(model_data, dict):
                 # Formato: {"model": state_dict}
-                model = DetectionModel('yolov8n.yaml')
-                model.load_state_dict(model_data)
+                model = _template_model()
+                model.load_state_dict(model_data, assign=True)
             else:
                 raise TypeError(f"Unsupported model data type: {type(model_data)}")
         else:
             # Formato: state_dict direto
-            model = DetectionModel('yolov8n.yaml')
-            model.load_state_dict(loaded)
+            model = _template_model()
+            model.load_state_dict(loaded, assign=True)
             
     elif isinstance(loaded, DetectionModel):
         # Formato: DetectionModel direto
@@ -316,4 +717,88 @@ def load_model_from_bytes(model_bytes: bytes):
 
     # Configurar modelo para inferência
     model.eval()
-    return model
\ No newline at end of file
+    return model
+
+
+def load_onnx_session_from_bytes(model_bytes, providers=None, intra_op_threads=None):
+    """
+    Cria uma sessão do ONNX Runtime a partir de bytes ONNX descriptografados.
+    
+    O grafo é otimizado pelo ONNX Runtime (ORT_ENABLE_ALL: fusão de
+    Conv+BN+ativação, eliminação de nós constantes) e executado pelos
+    kernels nativos do provider, sem dispatch Python por operador. O modelo
+    é entregue em memória, sem gravar o texto claro em disco.
+    
+    Args:
+        model_bytes (bytes | bytearray): Arquivo ONNX descriptografado
+        providers (list, optional): Execution providers em ordem de
+            preferência. Default: ["CPUExecutionProvider"]
+        intra_op_threads (int, optional): Threads de cada operador em CPU.
+            Default: escolha do ONNX Runtime (uma por núcleo físico)
+    
+    Returns:
+        onnxruntime.InferenceSession: Sessão pronta para session.run()
+    
+    Raises:
+        ImportError: Se onnxruntime não estiver instalado
+    
+    Example:
+        >>> model_data = decrypt_model("model/model.onnx.enc", aes_key)
+        >>> session = load_onnx_session_from_bytes(model_data)
+        >>> session.get_inputs()[0].shape
+        [1, 3, 640, 640]
+    """
+    import onnxruntime as ort
+    
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    # InferenceSession aceita apenas bytes (não bytearray/memoryview)
+    return ort.InferenceSession(
+        bytes(model_bytes), options, providers=providers or ["CPUExecutionProvider"]
+    )
+
+
+def load_trt_engine_from_bytes(model_bytes):
+    """
+    Desserializa um engine TensorRT a partir de bytes descriptografados.
+    
+    O engine já contém os kernels escolhidos para a GPU na exportação, então
+    a carga não otimiza nem compila nada. É desserializado direto da memória,
+    sem gravar o texto claro em disco.
+    
+    Args:
+        model_bytes (bytes | bytearray): Engine descriptografado; aceita o
+            cabeçalho de metadados (int32 + JSON) gravado pela Ultralytics
+    
+    Returns:
+        tensorrt.ICudaEngine: Engine pronto para create_execution_context()
+    
+    Raises:
+        ImportError: Se tensorrt não estiver instalado
+        RuntimeError: Se o engine foi gerado para outra versão do TensorRT
+                      ou outra GPU
+    
+    Example:
+        >>> model_data = decrypt_model("model/model.engine.enc", aes_key)
+        >>> engine = load_trt_engine_from_bytes(model_data)
+        >>> engine.num_io_tensors
+        2
+    """
+    import tensorrt as trt
+    
+    data = memoryview(model_bytes)
+    meta_len = int.from_bytes(data[:4], "little")
+    try:
+        json.loads(bytes(data[4:4 + meta_len]))
+        data = data[4 + meta_len:]
+    except ValueError:
+        # Engine sem cabeçalho de metadados (UnicodeDecodeError incluso)
+        pass
+    
+    runtime = trt.Runtime(trt.Logger(trt.Logger.WARNING))
+    engine = runtime.deserialize_cuda_engine(data)
+    if engine is None:
+        raise RuntimeError("Engine TensorRT incompatível com esta versão/GPU")
+    return engine
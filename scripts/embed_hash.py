@@ -1,30 +1,66 @@
-import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def generate_hash_registry_obfuscated(base_dir, output_path):
-    from pathlib import Path
-    import hashlib
+from hashing import new_hasher
+
+# Algoritmo do registro: sha256 (padrão), blake2b ou xxh3_64 (requer xxhash)
+HASH_ALGO = os.getenv("HASH_ALGO", "sha256")
+
+
+def _hash_file(path):
+    h = new_hasher(HASH_ALGO)
+    with open(path, "rb", buffering=0) as f:
+        # Arquivo mapeado e entregue ao hash em um único update (sem cópia)
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as mv:
+                    h.update(mv)
+    return h.hexdigest()
 
+
+def _iter_py(root):
+    # Varredura iterativa com os.scandir: o tipo de cada entrada vem do
+    # próprio diretório (d_type), sem um stat() por arquivo
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".py") and entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+
+def generate_hash_registry_obfuscated(base_dir, output_path):
     base_path = Path(base_dir)
     file_hashes = {}
 
-    model_path = Path("model/model.pth.enc")
+    model_paths = [
+        Path("model/model.safetensors.enc"),
+        Path("model/model.onnx.enc"),
+        Path("model/model_int8.onnx.enc"),
+        Path("model/model_fp16.onnx.enc"),
+        Path("model/model.engine.enc"),
+        Path("model/model_int8.engine.enc"),
+    ]
 
-    targets = [
-        base_path / "main.py",
-        model_path
-    ] + list((base_path / "scripts").rglob("*.py"))
+    targets = [path for path in (base_path / "main.py", *model_paths) if path.is_file()]
+    scripts_dir = base_path / "scripts"
+    if scripts_dir.is_dir():
+        targets += [Path(path) for path in _iter_py(scripts_dir)]
 
-    for path in targets:
-        if not path.is_file():
-            continue
-        rel_path = path.as_posix()
-        var_name = rel_path.replace("/", "_").replace(".", "_").upper()
-        with open(path, "rb") as f:
-            file_hashes[var_name] = hashlib.sha256(f.read()).hexdigest()
+    # hashlib libera o GIL durante o hash: arquivos processados em paralelo
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for path, file_hash in zip(targets, executor.map(_hash_file, targets)):
+            rel_path = path.as_posix()
+            var_name = rel_path.replace("/", "_").replace(".", "_").upper()
+            file_hashes[var_name] = file_hash
 
     with open(output_path, "w") as f:
         f.write("# Hashes dos arquivos ofuscados (modo produção)\n\n")
+        f.write(f"HASH_ALGO = \"{HASH_ALGO}\"\n\n")
         for var_name, file_hash in file_hashes.items():
             f.write(f"{var_name} = \"{file_hash}\"\n")
 
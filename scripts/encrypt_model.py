@@ -18,7 +18,7 @@ Fluxo de Criptografia:
 4. Salva modelo criptografado (nonce + dados) e chave protegida
 
 Arquivos de Saída:
-- model.pth.enc: Modelo criptografado (nonce + dados criptografados)
+- model.safetensors.enc: Modelo criptografado (nonce + dados criptografados)
 - aes_key.enc: Chave AES criptografada com RSA
 
 Dependências:
@@ -30,12 +30,64 @@ Versão: 1.0
 """
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import serialization, hashes
+import functools
 import os
+import queue
+import threading
 
+# Tamanho dos blocos lidos/criptografados por vez (1 MiB)
+ENCRYPT_CHUNK = 1 << 20
 
-def encrypt_model(model_path, enc_model_path, enc_key_path, public_key_path):
+# Layout do arquivo criptografado: nonce || ciphertext || tag (16 bytes)
+NONCE_LEN = 12  # tamanho recomendado para AES-GCM
+
+
+@functools.lru_cache(maxsize=8)
+def _load_public_key(public_key_path, mtime_ns):
+    """
+    Carrega e faz o parse de uma chave pública RSA PEM, com cache.
+    
+    Args:
+        public_key_path (str): Caminho para a chave pública RSA em formato PEM
+        mtime_ns (int): st_mtime_ns do arquivo (apenas para invalidar o cache)
+    
+    Returns:
+        RSAPublicKey: Chave pública carregada
+    """
+    with open(public_key_path, "rb") as f:
+        return serialization.load_pem_public_key(f.read())
+
+
+def _drain_to_file(f, chunks, errors):
+    """
+    Grava no arquivo os blocos recebidos pela fila até encontrar None.
+    
+    Executada em uma thread separada para sobrepor a escrita em disco com a
+    criptografia do próximo bloco. Em caso de erro (qualquer exceção), a
+    registra e continua consumindo a fila (sem gravar) até o None, para
+    nunca bloquear o produtor em chunks.put().
+    
+    Args:
+        f (io.BufferedWriter): Arquivo de saída aberto em modo binário
+        chunks (queue.Queue): Fila de blocos (bytes); None encerra
+        errors (list): Recebe a exceção de escrita, se houver; o produtor
+            interrompe a criptografia ao vê-la e a relança
+    """
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        if not errors:
+            try:
+                f.write(chunk)
+            except BaseException as e:
+                errors.append(e)
+
+
+def encrypt_model(model_path, enc_model_path, enc_key_path, public_key_path, aes_key=None):
     """
     Criptografa um modelo usando sistema híbrido AES-GCM + RSA-OAEP.
     
@@ -48,6 +100,10 @@ def encrypt_model(model_path, enc_model_path, enc_key_path, public_key_path):
         enc_model_path (str): Caminho de saída para o modelo criptografado
         enc_key_path (str): Caminho de saída para a chave AES criptografada
         public_key_path (str): Caminho para a chave pública RSA em formato PEM
+        aes_key (bytes, optional): Chave AES-128 a reutilizar (ex: para
+                                   criptografar vários formatos do mesmo
+                                   modelo sob uma única chave). Se None, uma
+                                   nova chave é gerada.
     
     Raises:
         FileNotFoundError: Se algum arquivo de entrada não existir
@@ -59,56 +115,78 @@ def encrypt_model(model_path, enc_model_path, enc_key_path, public_key_path):
         None
     
     Security Features:
-        - Chave AES única gerada aleatoriamente para cada execução
+        - Chave AES aleatória de 128 bits: nova a cada chamada com
+          aes_key=None; no script, uma única chave por execução é
+          compartilhada por todos os formatos do modelo (cada arquivo com
+          seu próprio nonce)
         - Nonce único de 12 bytes para AES-GCM (padrão recomendado)
         - RSA-OAEP com MGF1-SHA256 para máxima segurança
         - Autenticação integrada via AES-GCM (detecta alterações)
     
     File Format:
         - Modelo criptografado: [12 bytes nonce] + [dados AES-GCM criptografados]
+          + [16 bytes tag] (mesmo layout da API AESGCM one-shot)
         - Chave criptografada: [dados RSA-OAEP criptografados]
     
     Example:
         >>> encrypt_model(
-        ...     "model.pth", 
-        ...     "encrypted/model.pth.enc",
+        ...     "model.safetensors", 
+        ...     "encrypted/model.safetensors.enc",
         ...     "encrypted/aes_key.enc", 
         ...     "keys/public.pem"
         ... )
         Model and AES key encrypted.
     
     Note:
+        - Modelo lido e criptografado em blocos de ENCRYPT_CHUNK bytes, com a
+          escrita em disco sobreposta por uma thread dedicada
         - Cria automaticamente diretórios pai se não existirem
         - Sobrescreve arquivos de saída existentes sem aviso
         - Chave AES de 128 bits oferece segurança adequada com boa performance
         - Nonce é incluído no arquivo para não precisar ser gerenciado separadamente
     """
-    # Gerar chave AES aleatória de 128 bits
-    aes_key = AESGCM.generate_key(bit_length=128)
+    # Gerar chave AES aleatória de 128 bits (nonce novo a cada arquivo)
+    if aes_key is None:
+        aes_key = AESGCM.generate_key(bit_length=128)
     
     # Gerar nonce único para esta operação de criptografia
-    nonce = os.urandom(12)  # 12 bytes é o tamanho recomendado para AES-GCM
+    nonce = os.urandom(NONCE_LEN)
     
     # Inicializar cifra AES-GCM
-    aesgcm = AESGCM(aes_key)
+    encryptor = Cipher(algorithms.AES(aes_key), modes.GCM(nonce)).encryptor()
 
-    # Ler dados do modelo original
-    with open(model_path, "rb") as f:
-        model_data = f.read()
-
-    # Criptografar modelo com AES-GCM
-    encrypted_model = aesgcm.encrypt(nonce, model_data, None)
-    
     # Criar diretório de saída se necessário
     os.makedirs(os.path.dirname(enc_model_path), exist_ok=True)
     
-    # Salvar modelo criptografado (nonce + dados criptografados)
-    with open(enc_model_path, "wb") as f:
-        f.write(nonce + encrypted_model)
-
-    # Carregar chave pública RSA
-    with open(public_key_path, "rb") as f:
-        public_key = serialization.load_pem_public_key(f.read())
+    # Buffers reutilizados por bloco (update_into exige folga de block_size - 1)
+    in_buf = bytearray(ENCRYPT_CHUNK)
+    out_buf = bytearray(ENCRYPT_CHUNK + 15)
+    
+    # Salvar modelo criptografado (nonce + dados criptografados + tag):
+    # criptografia em blocos na thread principal, escrita em thread separada
+    chunks = queue.Queue(maxsize=2)
+    errors = []
+    with open(model_path, "rb") as src, open(enc_model_path, "wb") as dst:
+        writer = threading.Thread(target=_drain_to_file, args=(dst, chunks, errors))
+        writer.start()
+        try:
+            chunks.put(nonce)
+            with memoryview(in_buf) as in_view, memoryview(out_buf) as out_view:
+                while not errors and (n := src.readinto(in_buf)):
+                    written = encryptor.update_into(in_view[:n], out_buf)
+                    chunks.put(out_view[:written].tobytes())
+            encryptor.finalize()
+            chunks.put(encryptor.tag)
+        finally:
+            chunks.put(None)
+            writer.join()
+    if errors:
+        raise errors[0]
+
+    # Carregar chave pública RSA (parse do PEM em cache por caminho + mtime)
+    public_key = _load_public_key(
+        public_key_path, os.stat(public_key_path).st_mtime_ns
+    )
 
     # Criptografar chave AES com RSA-OAEP
     encrypted_key = public_key.encrypt(
@@ -131,9 +209,35 @@ def encrypt_model(model_path, enc_model_path, enc_key_path, public_key_path):
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Criptografa o modelo com AES-GCM + RSA-OAEP")
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="exibe vazão de AES-GCM, versão do OpenSSL e recursos de CPU detectados"
+    )
+    if parser.parse_args().verbose:
+        from _perf import _probe_aes
+        _probe_aes()
+
+    aes_key = AESGCM.generate_key(bit_length=128)
     encrypt_model(
-        "yolov8n.pt", 
-        "model/model.pth.enc",
+        "model.safetensors", 
+        "model/model.safetensors.enc",
         "key/aes_key.enc",
-        "key/public.pem"
-    )
\ No newline at end of file
+        "key/public.pem",
+        aes_key
+    )
+    # Exportações ONNX/TensorRT (opcionais) criptografadas com a mesma chave AES
+    for name in (
+        "model.onnx", "model_int8.onnx", "model_fp16.onnx",
+        "model.engine", "model_int8.engine",
+    ):
+        if os.path.exists(name):
+            encrypt_model(
+                name,
+                f"model/{name}.enc",
+                "key/aes_key.enc",
+                "key/public.pem",
+                aes_key
+            )
\ No newline at end of file
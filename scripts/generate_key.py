@@ -18,6 +18,8 @@ Uso típico:
 Arquivos gerados:
     - key/private.pem: Chave privada RSA
     - key/public.pem: Chave pública RSA
+    - scripts/_session_secret.py: Chave HMAC do token de sessão (ofuscada
+      pelo PyArmor junto com scripts/; fora do controle de versão)
 
 Segurança:
     ATENÇÃO: A chave privada é salva sem criptografia. Mantenha-a segura
@@ -34,6 +36,7 @@ Versão: 1.0
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives import serialization
 import os
+import secrets
 
 
 def generate_keys():
@@ -83,7 +86,7 @@ def generate_keys():
     with open("key/private.pem", "wb") as f:
         f.write(private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,  # PKCS#1 com parâmetros CRT
             encryption_algorithm=serialization.NoEncryption()  # Sem senha
         ))
 
@@ -97,5 +100,25 @@ def generate_keys():
     print("RSA key pair generated in key/")
 
 
+def generate_session_secret(output_path="scripts/_session_secret.py"):
+    """
+    Gera a chave HMAC do token de sessão (code_protection) deste build.
+    
+    A chave é gravada como módulo Python em scripts/, antes da etapa do
+    PyArmor, para que fique apenas no código ofuscado e nunca no registro
+    de hashes em texto claro. Uma chave nova a cada build invalida tokens
+    de builds anteriores.
+    
+    Args:
+        output_path (str, optional): Módulo de saída.
+            Default: "scripts/_session_secret.py"
+    """
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"SESSION_SECRET = \"{secrets.token_hex(32)}\"\n")
+    print(f"Session secret generated in {output_path}")
+
+
 if __name__ == "__main__":
-    generate_keys()
\ No newline at end of file
+    generate_keys()
+    generate_session_secret()
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Algoritmos de Hash do Registro de Integridade
+
+Compartilhado pelo script de build (embed_hash.py, que gera o registro) e
+pela verificação em tempo de execução (code_protection.check_integrity),
+garantindo que ambos usem exatamente o mesmo algoritmo. Não depende de
+psutil nem do restante da proteção em tempo de execução.
+
+Algoritmos suportados:
+- sha256 (padrão): criptográfico, acelerado por SHA-NI
+- blake2b: criptográfico, ~2x mais rápido que SHA-256 em CPUs sem SHA-NI
+- xxh3_64: apenas detecção de alteração (não criptográfico; requer xxhash)
+"""
+
+import hashlib
+
+
+def new_hasher(algorithm):
+    """
+    Cria o objeto de hash para o algoritmo registrado em hash_registry.
+    
+    Args:
+        algorithm (str): "sha256", "blake2b" ou "xxh3_64" (requer xxhash)
+    
+    Returns:
+        object: Objeto com update() e hexdigest()
+    """
+    if algorithm == "xxh3_64":
+        import xxhash
+        return xxhash.xxh3_64()
+    return hashlib.new(algorithm)
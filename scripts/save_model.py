@@ -0,0 +1,416 @@
+"""
+Exportação do Modelo YOLO (safetensors, ONNX, ONNX INT8, ONNX FP16 e TensorRT)
+
+Converte o checkpoint da Ultralytics (yolov8n.pt) em um arquivo safetensors
+contendo apenas os pesos da rede (state_dict), aceito por
+load_model_from_bytes(). Esse é o arquivo criptografado por encrypt_model.py.
+Também exporta o modelo para ONNX, usado pelo benchmark com --backend onnx
+(ONNX Runtime), e, se houver imagens de calibração em calib/, uma versão
+INT8 com quantização estática (pesos e ativações em int8). Com GPU CUDA
+disponível, exporta ainda uma versão FP16 para os providers CUDA/TensorRT e
+um engine TensorRT FP16, usado com --backend tensorrt, e, com calib/ e
+pytorch-quantization instalado, um engine TensorRT INT8 a partir de um ONNX
+com nós Q/DQ explícitos (--backend tensorrt --dtype int8).
+
+Motivação:
+- O checkpoint original serializa o objeto DetectionModel inteiro (árvore de
+  módulos, classes e referências), além de metadados de treino
+- Um state_dict contém só tensores: arquivo menor, menos trabalho de AES-GCM e
+  de leitura a cada descriptografia
+- safetensors é um cabeçalho JSON seguido dos bytes dos tensores, contíguos:
+  a carga não executa pickle e os tensores apontam direto para o buffer
+- Na carga, a arquitetura é reconstruída a partir de yolov8n.yaml
+
+Uso típico:
+    $ python scripts/save_model.py
+
+Arquivos gerados:
+    - model.safetensors: Pesos do modelo (texto claro; fica fora de model/,
+      que é copiado para a distribuição)
+    - model.onnx: Grafo ONNX com entrada estática 1x3x640x640, com as
+      constantes já dobradas (texto claro)
+    - model_int8.onnx: Grafo ONNX quantizado (INT8, formato QDQ), gerado
+      apenas se calib/ contiver imagens
+    - model_fp16.onnx: Grafo ONNX em FP16 (pesos e entrada), gerado apenas
+      com GPU CUDA disponível
+    - model.engine: Engine TensorRT FP16 para a GPU atual, gerado apenas com
+      GPU CUDA e tensorrt instalados
+    - model_qdq.onnx / model_int8.engine: Grafo ONNX com quantização
+      explícita (Q/DQ) e o engine TensorRT INT8 construído a partir dele;
+      exigem também calib/ e pytorch-quantization
+
+Dependências:
+    - torch: Framework de deep learning
+    - ultralytics: Biblioteca YOLO
+    - safetensors: Serialização dos pesos
+    - onnx (opcional): Exportação ONNX, instalado sob demanda pela Ultralytics
+    - onnxruntime: Dobra de constantes do ONNX exportado e quantização
+      estática INT8
+    - tensorrt (opcional): Construção do engine TensorRT
+    - pytorch-quantization (opcional): Quantização Q/DQ para o TensorRT INT8
+      (pip install --extra-index-url https://pypi.ngc.nvidia.com
+      pytorch-quantization)
+"""
+
+import os
+import torch
+from safetensors.torch import save_file
+from ultralytics import YOLO
+
+
+def save_state_dict(weights_path, output_path):
+    """
+    Salva apenas o state_dict de um modelo YOLO, em formato safetensors.
+
+    Tensores de ponto flutuante são gravados em float16, a mesma precisão do
+    checkpoint publicado pela Ultralytics; o benchmark converte o modelo para
+    a precisão de inferência (--dtype) após a carga.
+
+    Args:
+        weights_path (str): Checkpoint da Ultralytics (ex: "yolov8n.pt")
+        output_path (str): Caminho de saída do state_dict
+
+    Example:
+        >>> save_state_dict("yolov8n.pt", "model.safetensors")
+        State dict saved.
+    """
+    state_dict = {
+        name: tensor.half() if tensor.is_floating_point() else tensor
+        for name, tensor in YOLO(weights_path).model.state_dict().items()
+    }
+    save_file(state_dict, output_path)
+    print("State dict saved.")
+
+
+def export_onnx(weights_path, output_path, imgsz=640, half=False):
+    """
+    Exporta um modelo YOLO para ONNX com forma de entrada estática.
+
+    A forma fixa (dynamic=False) permite ao ONNX Runtime pré-alocar buffers e
+    escolher kernels uma única vez; simplify=True remove nós redundantes.
+
+    Args:
+        weights_path (str): Checkpoint da Ultralytics (ex: "yolov8n.pt")
+        output_path (str): Caminho de saída do arquivo .onnx
+        imgsz (int, optional): Lado da imagem de entrada. Default: 640
+        half (bool, optional): Exporta em FP16 (requer GPU CUDA: a
+            Ultralytics só exporta FP16 a partir de device=0). Default: False
+
+    Example:
+        >>> export_onnx("yolov8n.pt", "model.onnx")
+        ONNX model exported.
+    """
+    device_args = {"half": True, "device": 0} if half else {}
+    exported = YOLO(weights_path).export(
+        format="onnx", simplify=True, dynamic=False, imgsz=imgsz, **device_args
+    )
+    os.replace(exported, output_path)
+    print("ONNX model exported.")
+
+
+def fold_onnx_constants(onnx_path):
+    """
+    Especializa um modelo ONNX de forma estática, dobrando suas constantes.
+    
+    Com a entrada fixa (dynamic=False), o cálculo de formas (Shape, Gather,
+    Constant) é constante. As otimizações básicas do ONNX Runtime (dobra de
+    constantes, eliminação de nós redundantes) são aplicadas aqui, uma
+    única vez, e o arquivo é regravado no lugar. O grafo resultante só tem
+    operadores ONNX padrão, então continua válido para qualquer provider;
+    as fusões dependentes de hardware e o pré-empacotamento dos pesos
+    seguem a cargo de ORT_ENABLE_ALL na criação da sessão.
+    
+    Args:
+        onnx_path (str): Modelo ONNX a otimizar (sobrescrito)
+    
+    Example:
+        >>> fold_onnx_constants("model.onnx")
+        ONNX constants folded.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    options.optimized_model_filepath = onnx_path + ".tmp"
+    ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+    os.replace(options.optimized_model_filepath, onnx_path)
+    print("ONNX constants folded.")
+
+
+def export_engine(weights_path, output_path, imgsz=640):
+    """
+    Constrói um engine TensorRT FP16 com forma de entrada estática.
+    
+    A seleção de kernels (tática por camada) é feita uma única vez aqui, na
+    GPU atual; o engine só é válido para a mesma GPU e versão do TensorRT.
+    
+    Args:
+        weights_path (str): Checkpoint da Ultralytics (ex: "yolov8n.pt")
+        output_path (str): Caminho de saída do arquivo .engine
+        imgsz (int, optional): Lado da imagem de entrada. Default: 640
+    
+    Example:
+        >>> export_engine("yolov8n.pt", "model.engine")
+        TensorRT engine exported.
+    """
+    exported = YOLO(weights_path).export(
+        format="engine", half=True, int8=False, dynamic=False, imgsz=imgsz,
+        workspace=4, device=0
+    )
+    os.replace(exported, output_path)
+    print("TensorRT engine exported.")
+
+
+def _calib_images(calib_dir, max_images=100, imgsz=640):
+    """
+    Gera as imagens de calibração de calib_dir, pré-processadas.
+    
+    Mesmo pré-processamento da Ultralytics: redimensionamento para
+    imgsz x imgsz, RGB, valores em [0, 1], layout NCHW com lote 1.
+    
+    Args:
+        calib_dir (str): Diretório com imagens de calibração (.jpg/.png)
+        max_images (int, optional): Máximo de imagens usadas. Default: 100
+        imgsz (int, optional): Lado da imagem de entrada. Default: 640
+    
+    Yields:
+        np.ndarray: Imagem float32 de forma (1, 3, imgsz, imgsz)
+    """
+    import cv2
+    import numpy as np
+
+    images = sorted(
+        entry.path for entry in os.scandir(calib_dir)
+        if entry.name.lower().endswith((".jpg", ".jpeg", ".png"))
+    )[:max_images]
+    for path in images:
+        image = cv2.resize(cv2.imread(path), (imgsz, imgsz))
+        image = image[:, :, ::-1].transpose(2, 0, 1)
+        yield np.ascontiguousarray(image, dtype=np.float32)[None] / 255.0
+
+
+def quantize_onnx_int8(onnx_path, output_path, calib_dir, max_images=100, imgsz=640):
+    """
+    Quantiza estaticamente um modelo ONNX para INT8 (pesos e ativações).
+
+    As escalas das ativações são calibradas executando o modelo FP32 sobre
+    imagens representativas. Em CPUs com VNNI (AVX512-VNNI/AVX-VNNI), os
+    produtos escalares int8 processam ~4x mais MACs por ciclo que FMA FP32;
+    em CPUs sem VNNI o modelo INT8 tende a ser mais lento que o FP32, por
+    isso o benchmark volta ao FP32 nesses casos.
+
+    Args:
+        onnx_path (str): Modelo ONNX FP32 de entrada
+        output_path (str): Caminho de saída do modelo INT8
+        calib_dir (str): Diretório com imagens de calibração (.jpg/.png)
+        max_images (int, optional): Máximo de imagens usadas. Default: 100
+        imgsz (int, optional): Lado da imagem de entrada. Default: 640
+
+    Example:
+        >>> quantize_onnx_int8("model.onnx", "model_int8.onnx", "calib")
+        INT8 ONNX model exported.
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    input_name = onnx.load(onnx_path, load_external_data=False).graph.input[0].name
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self._images = _calib_images(calib_dir, max_images, imgsz)
+
+        def get_next(self):
+            batch = next(self._images, None)
+            return None if batch is None else {input_name: batch}
+
+    quantize_static(
+        onnx_path,
+        output_path,
+        ImageReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    print("INT8 ONNX model exported.")
+
+
+def _load_quant_state_dict(model, state_dict):
+    """
+    Carrega os pesos do checkpoint no modelo com quantizadores.
+    
+    strict=False é necessário porque os amax dos quantizadores (chaves
+    terminadas em "_amax") não existem no checkpoint; qualquer outra
+    divergência indica arquitetura incompatível e é rejeitada.
+    
+    Args:
+        model (torch.nn.Module): Modelo com camadas do pytorch-quantization
+        state_dict (dict): Pesos do checkpoint FP32
+    
+    Raises:
+        RuntimeError: Se faltar algum peso que não seja amax ou sobrar
+            alguma chave sem correspondente no modelo
+    """
+    result = model.load_state_dict(state_dict, strict=False)
+    missing = [k for k in result.missing_keys if not k.endswith("_amax")]
+    if missing or result.unexpected_keys:
+        raise RuntimeError(
+            f"Checkpoint incompatível com o modelo Q/DQ: faltando {missing}, "
+            f"inesperadas {result.unexpected_keys}"
+        )
+
+
+def export_qdq_onnx(weights_path, output_path, calib_dir, max_images=100, imgsz=640):
+    """
+    Exporta um ONNX com quantização explícita (nós QuantizeLinear/
+    DequantizeLinear) para o TensorRT INT8.
+    
+    O modelo é reconstruído de yolov8n.yaml com as camadas do
+    pytorch-quantization (QuantConv2d etc.) e recebe os pesos do
+    checkpoint. As escalas das ativações vêm de histogramas coletados
+    sobre as imagens de calibração (percentil 99,99, menos sensível a
+    outliers que o máximo); as dos pesos, do máximo por canal. Com as
+    escalas fixadas no grafo, o TensorRT não recalibra e a precisão INT8
+    fica estável entre builds. O modelo com fake-quant é o ponto de
+    partida de um ajuste fino QAT, feito antes da exportação quando houver
+    dataset rotulado.
+    
+    Args:
+        weights_path (str): Checkpoint da Ultralytics (ex: "yolov8n.pt")
+        output_path (str): Caminho de saída do arquivo .onnx
+        calib_dir (str): Diretório com imagens de calibração (.jpg/.png)
+        max_images (int, optional): Máximo de imagens usadas. Default: 100
+        imgsz (int, optional): Lado da imagem de entrada. Default: 640
+    
+    Example:
+        >>> export_qdq_onnx("yolov8n.pt", "model_qdq.onnx", "calib")
+        Q/DQ ONNX model exported.
+    """
+    from pytorch_quantization import calib, quant_modules
+    from pytorch_quantization import nn as quant_nn
+    from pytorch_quantization.tensor_quant import QuantDescriptor
+    from ultralytics.nn.tasks import DetectionModel
+
+    state_dict = YOLO(weights_path).model.float().state_dict()
+    quant_nn.QuantConv2d.set_default_quant_desc_input(
+        QuantDescriptor(calib_method="histogram")
+    )
+    # Camadas criadas entre initialize() e deactivate() usam as versões
+    # quantizadas (torch.nn.Conv2d -> QuantConv2d)
+    quant_modules.initialize()
+    try:
+        model = DetectionModel("yolov8n.yaml", verbose=False)
+    finally:
+        quant_modules.deactivate()
+    _load_quant_state_dict(model, state_dict)
+    model.eval()
+
+    quantizers = [m for m in model.modules() if isinstance(m, quant_nn.TensorQuantizer)]
+    for quantizer in quantizers:
+        if quantizer._calibrator is not None:
+            quantizer.disable_quant()
+            quantizer.enable_calib()
+        else:
+            quantizer.disable()
+    with torch.no_grad():
+        for image in _calib_images(calib_dir, max_images, imgsz):
+            model(torch.from_numpy(image))
+    for quantizer in quantizers:
+        if quantizer._calibrator is not None:
+            if isinstance(quantizer._calibrator, calib.MaxCalibrator):
+                quantizer.load_calib_amax()
+            else:
+                quantizer.load_calib_amax(method="percentile", percentile=99.99)
+            quantizer.disable_calib()
+            quantizer.enable_quant()
+        else:
+            quantizer.enable()
+
+    # Fake-quant exportado como QuantizeLinear/DequantizeLinear (opset 13)
+    quant_nn.TensorQuantizer.use_fb_fake_quant = True
+    for module in model.modules():
+        if hasattr(module, "export"):
+            module.export = True
+    example = torch.zeros(1, 3, imgsz, imgsz)
+    with torch.no_grad():
+        model(example)
+        torch.onnx.export(
+            model, example, output_path, opset_version=13,
+            do_constant_folding=True, input_names=["images"],
+            output_names=["output0"]
+        )
+    print("Q/DQ ONNX model exported.")
+
+
+def build_int8_engine(onnx_path, output_path, workspace=4):
+    """
+    Constrói um engine TensorRT INT8 a partir de um ONNX com nós Q/DQ.
+    
+    Equivale a `trtexec --int8 --onnx=... --saveEngine=...`: as escalas já
+    estão no grafo (quantização explícita), então não há calibrador; FP16
+    fica habilitado para as camadas sem Q/DQ.
+    
+    Args:
+        onnx_path (str): Modelo ONNX Q/DQ (ver export_qdq_onnx)
+        output_path (str): Caminho de saída do arquivo .engine
+        workspace (int, optional): Memória de trabalho do builder, em GiB.
+            Default: 4
+    
+    Raises:
+        RuntimeError: Se o ONNX não puder ser interpretado ou o build falhar
+    
+    Example:
+        >>> build_int8_engine("model_qdq.onnx", "model_int8.engine")
+        INT8 TensorRT engine exported.
+    """
+    import tensorrt as trt
+
+    logger = trt.Logger(trt.Logger.WARNING)
+    builder = trt.Builder(logger)
+    network = builder.create_network(
+        1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
+    )
+    parser = trt.OnnxParser(network, logger)
+    if not parser.parse_from_file(onnx_path):
+        errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+        raise RuntimeError(f"Falha ao interpretar {onnx_path}: {errors}")
+
+    config = builder.create_builder_config()
+    config.set_memory_pool_limit(trt.MemoryPoolType.WORKSPACE, workspace << 30)
+    config.set_flag(trt.BuilderFlag.INT8)
+    config.set_flag(trt.BuilderFlag.FP16)
+    engine = builder.build_serialized_network(network, config)
+    if engine is None:
+        raise RuntimeError("Falha ao construir o engine TensorRT INT8")
+    with open(output_path, "wb") as f:
+        f.write(engine)
+    print("INT8 TensorRT engine exported.")
+
+
+if __name__ == "__main__":
+    save_state_dict("yolov8n.pt", "model.safetensors")
+    export_onnx("yolov8n.pt", "model.onnx")
+    fold_onnx_constants("model.onnx")
+    if os.path.isdir("calib"):
+        quantize_onnx_int8("model.onnx", "model_int8.onnx", "calib")
+    if torch.cuda.is_available():
+        export_onnx("yolov8n.pt", "model_fp16.onnx", half=True)
+        try:
+            import tensorrt  # noqa: F401
+        except ImportError:
+            print("tensorrt não instalado; engine TensorRT não exportado.")
+        else:
+            export_engine("yolov8n.pt", "model.engine")
+            try:
+                import pytorch_quantization  # noqa: F401
+            except ImportError:
+                print("pytorch-quantization não instalado; engine INT8 não exportado.")
+            else:
+                if os.path.isdir("calib"):
+                    export_qdq_onnx("yolov8n.pt", "model_qdq.onnx", "calib")
+                    build_int8_engine("model_qdq.onnx", "model_int8.engine")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Raiz do projeto (main.py, pacote scripts) e scripts/ (módulos importados
+# diretamente, como em "python scripts/<script>.py")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "scripts")]
@@ -0,0 +1,113 @@
+import os
+import secrets
+import time
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from code_protection import (  # noqa: E402
+    SESSION_TTL,
+    _session_tag,
+    _session_token_path,
+    is_session_verified,
+    mark_session_verified,
+)
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    runtime_dir = tmp_path / "run"
+    runtime_dir.mkdir(mode=0o700)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime_dir))
+    paths = []
+    for name in ("main.py", "model.enc"):
+        path = tmp_path / name
+        path.write_bytes(os.urandom(64))
+        paths.append(str(path))
+    return paths
+
+
+def _write_token(content):
+    fd = os.open(_session_token_path(), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+
+
+def test_marked_session_is_verified(files):
+    secret = secrets.token_hex(32)
+    assert not is_session_verified(files, secret)
+    mark_session_verified(files, secret)
+    assert is_session_verified(files, secret)
+
+
+def test_token_path_is_per_user_runtime_dir(files):
+    assert _session_token_path() == os.path.join(os.environ["XDG_RUNTIME_DIR"], ".bench_tok")
+
+
+def test_no_secret_disables_token(files):
+    mark_session_verified(files, None)
+    assert not os.path.exists(_session_token_path())
+    assert not is_session_verified(files, None)
+
+
+def test_forged_token_is_rejected(files):
+    secret = secrets.token_hex(32)
+    expiry = int(time.time()) + SESSION_TTL
+    _write_token(f"{expiry}:{_session_tag(secrets.token_hex(32), expiry, files)}")
+    assert not is_session_verified(files, secret)
+    _write_token(f"{expiry}:{'0' * 64}")
+    assert not is_session_verified(files, secret)
+
+
+def test_expired_token_is_rejected(files):
+    secret = secrets.token_hex(32)
+    expiry = int(time.time()) - 1
+    _write_token(f"{expiry}:{_session_tag(secret, expiry, files)}")
+    assert not is_session_verified(files, secret)
+
+
+def test_expiry_beyond_ttl_is_rejected(files):
+    secret = secrets.token_hex(32)
+    expiry = int(time.time()) + SESSION_TTL + 3600
+    _write_token(f"{expiry}:{_session_tag(secret, expiry, files)}")
+    assert not is_session_verified(files, secret)
+
+
+def test_changed_file_invalidates_token(files):
+    secret = secrets.token_hex(32)
+    mark_session_verified(files, secret)
+    st = os.stat(files[1])
+    with open(files[1], "r+b") as f:
+        f.write(b"\0")
+    # Mesmo tamanho e mtime restaurado: ctime ainda muda
+    os.utime(files[1], ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert not is_session_verified(files, secret)
+
+
+def test_replaced_file_invalidates_token(files):
+    secret = secrets.token_hex(32)
+    mark_session_verified(files, secret)
+    replacement = files[0] + ".new"
+    with open(files[0], "rb") as src, open(replacement, "wb") as dst:
+        dst.write(src.read())
+    os.replace(replacement, files[0])
+    assert not is_session_verified(files, secret)
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="sem links simbólicos")
+def test_symlinked_token_is_rejected(files, tmp_path):
+    secret = secrets.token_hex(32)
+    expiry = int(time.time()) + SESSION_TTL
+    target = tmp_path / "elsewhere"
+    target.write_text(f"{expiry}:{_session_tag(secret, expiry, files)}")
+    os.chmod(target, 0o600)
+    os.symlink(target, _session_token_path())
+    assert not is_session_verified(files, secret)
+
+
+def test_token_readable_by_others_is_rejected(files):
+    secret = secrets.token_hex(32)
+    mark_session_verified(files, secret)
+    os.chmod(_session_token_path(), 0o644)
+    assert not is_session_verified(files, secret)
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from decrypt_model import (
+    DECRYPT_CHUNK,
+    decrypt_aes_key,
+    decrypt_model,
+    decrypt_model_from_bytes,
+    load_and_decrypt_model,
+)
+from encrypt_model import ENCRYPT_CHUNK, encrypt_model
+
+SIZES = [
+    0, 15, 16, 17,
+    ENCRYPT_CHUNK - 1, ENCRYPT_CHUNK, ENCRYPT_CHUNK + 1,
+    DECRYPT_CHUNK - 1, DECRYPT_CHUNK, DECRYPT_CHUNK + 1,
+]
+
+
+@pytest.fixture(scope="module")
+def keys(tmp_path_factory):
+    key_dir = tmp_path_factory.mktemp("key")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path = key_dir / "private.pem"
+    public_path = key_dir / "public.pem"
+    private_path.write_bytes(private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption()
+    ))
+    public_path.write_bytes(private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    return str(private_path), str(public_path)
+
+
+def _encrypt(tmp_path, keys, data):
+    _, public_path = keys
+    model_path = tmp_path / "model.bin"
+    model_path.write_bytes(data)
+    enc_model_path = str(tmp_path / "model" / "model.bin.enc")
+    enc_key_path = str(tmp_path / "key" / "aes_key.enc")
+    encrypt_model(str(model_path), enc_model_path, enc_key_path, public_path)
+    return enc_model_path, enc_key_path
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_round_trip(tmp_path, keys, size):
+    data = os.urandom(size)
+    enc_model_path, enc_key_path = _encrypt(tmp_path, keys, data)
+    aes_key = decrypt_aes_key(enc_key_path, keys[0])
+
+    assert os.path.getsize(enc_model_path) == size + 12 + 16
+    assert decrypt_model(enc_model_path, aes_key) == data
+    with open(enc_model_path, "rb") as f:
+        assert decrypt_model_from_bytes(f.read(), aes_key) == data
+    assert load_and_decrypt_model(enc_key_path, keys[0], enc_model_path) == data
+
+
+@pytest.mark.parametrize("offset", [0, 12, -1])
+def test_tampered_file_raises_invalid_tag(tmp_path, keys, offset):
+    enc_model_path, enc_key_path = _encrypt(tmp_path, keys, os.urandom(1000))
+    aes_key = decrypt_aes_key(enc_key_path, keys[0])
+    with open(enc_model_path, "r+b") as f:
+        blob = bytearray(f.read())
+        blob[offset] ^= 1
+        f.seek(0)
+        f.write(blob)
+
+    with pytest.raises(InvalidTag):
+        decrypt_model(enc_model_path, aes_key)
+    with pytest.raises(InvalidTag):
+        decrypt_model_from_bytes(bytes(blob), aes_key)
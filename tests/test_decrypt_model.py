@@ -0,0 +1,91 @@
+import io
+
+import pytest
+
+torch = pytest.importorskip("torch")
+safetensors_torch = pytest.importorskip("safetensors.torch")
+
+from decrypt_model import (  # noqa: E402
+    _MemoryViewReader,
+    _is_safetensors,
+    _load_safetensors_frombuffer,
+    _torch_load_bytes,
+)
+
+
+def _state_dict():
+    return {
+        "conv.weight": torch.randn(4, 3, 3, 3),
+        "bn.running_mean": torch.randn(4, dtype=torch.float64),
+        "bn.num_batches_tracked": torch.tensor(7),
+        "half": torch.randn(2, 5).half(),
+        "bf16": torch.randn(3).bfloat16(),
+        "mask": torch.tensor([True, False, True]),
+        "bytes": torch.arange(10, dtype=torch.uint8),
+        "empty": torch.empty(0, 3),
+    }
+
+
+def _assert_same(expected, loaded):
+    assert loaded.keys() == expected.keys()
+    for name, tensor in expected.items():
+        assert loaded[name].dtype == tensor.dtype
+        assert loaded[name].shape == tensor.shape
+        assert torch.equal(loaded[name], tensor)
+
+
+@pytest.mark.parametrize("wrap", [bytearray, bytes])
+def test_safetensors_frombuffer_matches_save(wrap):
+    state_dict = _state_dict()
+    data = wrap(safetensors_torch.save(state_dict))
+
+    assert _is_safetensors(data)
+    _assert_same(state_dict, _load_safetensors_frombuffer(data))
+
+
+def test_safetensors_frombuffer_shares_writable_buffer():
+    data = bytearray(safetensors_torch.save({"w": torch.zeros(4)}))
+    loaded = _load_safetensors_frombuffer(data)
+    loaded["w"][0] = 1.0
+    assert _load_safetensors_frombuffer(data)["w"][0] == 1.0
+
+
+def test_torch_save_is_not_safetensors():
+    buffer = io.BytesIO()
+    torch.save(_state_dict(), buffer)
+    assert not _is_safetensors(buffer.getvalue())
+
+
+def test_torch_load_bytes_round_trip():
+    state_dict = _state_dict()
+    buffer = io.BytesIO()
+    torch.save(state_dict, buffer)
+    _assert_same(state_dict, _torch_load_bytes(bytearray(buffer.getvalue())))
+
+
+def test_memory_view_reader_matches_bytesio():
+    data = b"first line\nsecond\n" + bytes(range(256)) * 40 + b"\ntail"
+    reader, expected = _MemoryViewReader(bytearray(data)), io.BytesIO(data)
+
+    assert reader.readline() == expected.readline()
+    assert reader.read(5) == expected.read(5)
+    assert reader.readline(3) == expected.readline(3)
+    buf_a, buf_b = bytearray(100), bytearray(100)
+    assert reader.readinto(buf_a) == expected.readinto(buf_b)
+    assert buf_a == buf_b
+    assert reader.readline() == expected.readline()
+    assert reader.seek(-4, io.SEEK_END) == expected.seek(-4, io.SEEK_END)
+    assert reader.read() == expected.read() == b"tail"
+    assert reader.read(10) == b""
+    assert reader.seek(3) == 3
+    assert reader.seek(2, io.SEEK_CUR) == 5
+    assert reader.tell() == 5
+    assert reader.read() == data[5:]
+
+
+def test_memory_view_reader_with_torch_load():
+    state_dict = _state_dict()
+    buffer = io.BytesIO()
+    torch.save(state_dict, buffer)
+    loaded = torch.load(_MemoryViewReader(buffer.getvalue()), weights_only=True)
+    _assert_same(state_dict, loaded)
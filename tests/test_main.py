@@ -0,0 +1,62 @@
+import argparse
+import os
+
+import pytest
+
+pytest.importorskip("psutil")
+
+import main  # noqa: E402
+from scripts import _perf  # noqa: E402
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    (tmp_path / "model").mkdir()
+    monkeypatch.setattr(main, "resource_path", lambda p: str(tmp_path / p))
+    return tmp_path
+
+
+def _args(backend, dtype="fp32"):
+    return argparse.Namespace(backend=backend, dtype=dtype)
+
+
+def _add(model_dir, key):
+    open(os.path.join(model_dir, main.MODEL_FILES[key]), "wb").close()
+
+
+@pytest.mark.parametrize("backend", ["torch", "onnx", "tensorrt"])
+def test_select_model_fp32(model_dir, backend):
+    assert main.select_model(_args(backend)) == backend
+
+
+def test_select_model_onnx_int8_missing_file(model_dir):
+    assert main.select_model(_args("onnx", "int8")) == "onnx"
+
+
+@pytest.mark.parametrize("vnni, expected", [
+    (True, "onnx-int8"), (None, "onnx-int8"), (False, "onnx"),
+])
+def test_select_model_onnx_int8_vnni(model_dir, monkeypatch, vnni, expected):
+    _add(model_dir, "onnx-int8")
+    monkeypatch.setattr(_perf, "has_vnni", lambda: vnni)
+    assert main.select_model(_args("onnx", "int8")) == expected
+
+
+def test_select_model_tensorrt_int8(model_dir):
+    assert main.select_model(_args("tensorrt", "int8")) == "tensorrt"
+    _add(model_dir, "tensorrt-int8")
+    assert main.select_model(_args("tensorrt", "int8")) == "tensorrt-int8"
+
+
+@pytest.mark.parametrize("providers, present, expected", [
+    (["CPUExecutionProvider"], True, "onnx"),
+    (["CUDAExecutionProvider", "CPUExecutionProvider"], False, "onnx"),
+    (["CUDAExecutionProvider", "CPUExecutionProvider"], True, "onnx-fp16"),
+    (["TensorrtExecutionProvider"], True, "onnx-fp16"),
+])
+def test_select_model_onnx_fp16(model_dir, monkeypatch, providers, present, expected):
+    ort = pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(ort, "get_available_providers", lambda: providers)
+    if present:
+        _add(model_dir, "onnx-fp16")
+    assert main.select_model(_args("onnx", "fp16")) == expected
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("cryptography")
+
+import _perf  # noqa: E402
+
+_AVX512_VNNI = [0, 0, 0, 1 << 11]
+
+
+@pytest.mark.parametrize("flags, expected", [
+    ({"avx2", "avx_vnni"}, True),
+    ({"avx2", "avx512_vnni"}, True),
+    ({"avx2"}, False),
+])
+def test_has_vnni_from_cpuinfo(monkeypatch, flags, expected):
+    monkeypatch.setattr(_perf, "_cpuinfo_flags", lambda: flags)
+    monkeypatch.setattr(_perf, "_ia32cap", lambda: [0, 0, 0, 0])
+    assert _perf.has_vnni() is expected
+
+
+@pytest.mark.parametrize("cap, expected", [
+    (_AVX512_VNNI, True),
+    ([0, 0, 0, 0], None),  # AVX-VNNI não aparece em OPENSSL_ia32cap
+    (None, None),
+])
+def test_has_vnni_from_ia32cap(monkeypatch, cap, expected):
+    monkeypatch.setattr(_perf, "_cpuinfo_flags", lambda: None)
+    monkeypatch.setattr(_perf, "_ia32cap", lambda: cap)
+    assert _perf.has_vnni() is expected
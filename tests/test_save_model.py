@@ -0,0 +1,52 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+pytest.importorskip("safetensors")
+
+from save_model import _load_quant_state_dict  # noqa: E402
+
+
+class _TensorQuantizer(torch.nn.Module):
+    """Substituto de pytorch_quantization.nn.TensorQuantizer (só o amax)."""
+
+    def __init__(self):
+        super().__init__()
+        self.register_buffer("_amax", torch.ones(1))
+
+
+class _QuantConv2d(torch.nn.Conv2d):
+    """Substituto de pytorch_quantization.nn.QuantConv2d."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._input_quantizer = _TensorQuantizer()
+        self._weight_quantizer = _TensorQuantizer()
+
+
+def _models():
+    plain = torch.nn.Sequential(torch.nn.Conv2d(3, 4, 3))
+    quant = torch.nn.Sequential(_QuantConv2d(3, 4, 3))
+    return plain, quant
+
+
+def test_load_quant_state_dict_ignores_amax():
+    plain, quant = _models()
+    _load_quant_state_dict(quant, plain.state_dict())
+    assert torch.equal(quant[0].weight, plain[0].weight)
+
+
+def test_load_quant_state_dict_rejects_unexpected_keys():
+    plain, quant = _models()
+    state_dict = plain.state_dict()
+    state_dict["extra.weight"] = torch.zeros(1)
+    with pytest.raises(RuntimeError):
+        _load_quant_state_dict(quant, state_dict)
+
+
+def test_load_quant_state_dict_rejects_missing_weights():
+    plain, quant = _models()
+    state_dict = plain.state_dict()
+    del state_dict["0.bias"]
+    with pytest.raises(RuntimeError):
+        _load_quant_state_dict(quant, state_dict)